@@ -0,0 +1,154 @@
+import asyncio
+import math
+import os
+import time
+import threading
+from concurrent.futures import Executor, Future, ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from typing import Callable, List, Optional
+import logging
+
+
+class Overloaded(Exception):
+    """Raised when a request is shed instead of being admitted"""
+
+    def __init__(self, status_code: int, retry_after: float, reason: str):
+        super().__init__(reason)
+        self.status_code = status_code
+        self.retry_after = retry_after
+        self.reason = reason
+
+    @property
+    def headers(self) -> dict:
+        return {"Retry-After": str(max(1, math.ceil(self.retry_after)))}
+
+
+class Deadline:
+    """
+    Absolute point in time (monotonic clock) by which a request must finish
+    """
+
+    def __init__(self, timeout: float):
+        self.timeout = timeout
+        self.expires_at = time.monotonic() + timeout
+
+    def remaining(self) -> float:
+        return max(0.0, self.expires_at - time.monotonic())
+
+    @property
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+
+class Slot(Executor):
+    """
+    Executor handed to an admitted request
+
+    Work submitted here runs on the controller's thread pool and keeps the
+    slot occupied until it finishes, even if the request stops waiting on it.
+    """
+
+    def __init__(self, pool: ThreadPoolExecutor):
+        self._pool = pool
+        self.futures: List[Future] = []
+
+    def submit(self, fn: Callable, /, *args, **kwargs) -> Future:
+        future = self._pool.submit(fn, *args, **kwargs)
+        self.futures.append(future)
+        return future
+
+
+class AdmissionController:
+    def __init__(
+        self,
+        max_in_flight: int,
+        max_queue: int,
+        queue_timeout: float,
+        retry_after: float
+    ):
+        """
+        Cap the number of concurrently running requests and shed the rest
+
+        Args:
+            max_in_flight (int): Requests allowed to run at the same time
+            max_queue (int): Requests allowed to wait for a free slot
+            queue_timeout (float): Longest time a request may wait in the queue
+            retry_after (float): Seconds advertised in the Retry-After header
+        """
+        self.max_in_flight = max_in_flight
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self.retry_after = retry_after
+        self._slots = asyncio.Semaphore(max_in_flight)
+        self._waiting = 0
+        # One worker per slot, so abandoned work can never exceed the cap
+        self._pool = ThreadPoolExecutor(max_workers=max_in_flight, thread_name_prefix="admission")
+
+    @classmethod
+    def from_env(cls, prefix: str) -> "AdmissionController":
+        """Build a controller from <PREFIX>_MAX_IN_FLIGHT style environment variables"""
+        return cls(
+            max_in_flight=int(os.getenv(f"{prefix}_MAX_IN_FLIGHT", 8)),
+            max_queue=int(os.getenv(f"{prefix}_MAX_QUEUE", 16)),
+            queue_timeout=float(os.getenv(f"{prefix}_QUEUE_TIMEOUT_SECONDS", 5)),
+            retry_after=float(os.getenv(f"{prefix}_RETRY_AFTER_SECONDS", 2)),
+        )
+
+    @asynccontextmanager
+    async def admit(self, deadline: Optional[Deadline] = None):
+        """
+        Hold a slot for the duration of the block, yielding a Slot executor
+
+        Blocking work should be run on the yielded Slot (for example with
+        loop.run_in_executor). If the block exits while that work is still
+        running, the slot is only released once the work has finished.
+
+        Raises Overloaded with 503 when the queue is already full, and with 429
+        when no slot frees up before the queue timeout (or the deadline) passes.
+        """
+        if not self._slots.locked():
+            # A free slot is taken without yielding, so the count is exact
+            await self._slots.acquire()
+        elif self._waiting >= self.max_queue:
+            logging.warning(f"Shedding request: {self._waiting} requests already queued")
+            raise Overloaded(503, self.retry_after, "Server is at capacity, queue is full")
+        else:
+            wait = self.queue_timeout
+            if deadline is not None:
+                wait = min(wait, deadline.remaining())
+
+            self._waiting += 1
+            try:
+                await asyncio.wait_for(self._slots.acquire(), timeout=wait)
+            except asyncio.TimeoutError:
+                logging.warning(f"Shedding request: no free slot after waiting {wait:.2f}s")
+                raise Overloaded(429, self.retry_after, "Timed out waiting for a free slot")
+            finally:
+                self._waiting -= 1
+
+        slot = Slot(self._pool)
+        try:
+            yield slot
+        finally:
+            self._release_when_done(slot)
+
+    def _release_when_done(self, slot: Slot) -> None:
+        pending = [f for f in slot.futures if not f.done()]
+        if not pending:
+            self._slots.release()
+            return
+
+        logging.warning(f"Holding slot until {len(pending)} abandoned task(s) finish")
+        loop = asyncio.get_running_loop()
+        remaining = [len(pending)]
+        lock = threading.Lock()
+
+        def on_done(_: Future) -> None:
+            with lock:
+                remaining[0] -= 1
+                last = remaining[0] == 0
+            if last:
+                loop.call_soon_threadsafe(self._slots.release)
+
+        for future in pending:
+            future.add_done_callback(on_done)
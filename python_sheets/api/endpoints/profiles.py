@@ -1,29 +1,60 @@
-from fastapi import APIRouter, HTTPException
-from typing import List, Dict, Any
+from fastapi import APIRouter, HTTPException, Header, Query, Request
+from typing import List, Dict, Any, Optional
 from pydantic import BaseModel
-from chakra_api.chakra_client import ChakraClient
+from chakra_api.chakra_client import ChakraClient, PROFILE_ID_COLUMN
+from api.admission import AdmissionController, Deadline, Overloaded
+from api.http_cache import ConditionalResponder
+import asyncio
 import logging
+import os
 
 router = APIRouter()
 
+# Upper bound (and default) for a search request's deadline, in seconds
+SEARCH_TIMEOUT_SECONDS = float(os.getenv("SEARCH_TIMEOUT_SECONDS", 30))
+
+search_admission = AdmissionController.from_env("SEARCH")
+
+# ETags and cached bodies for read endpoints, keyed to the profiles dataset version
+profiles_cache = ConditionalResponder.from_env("linkedin_profiles")
+
+# Largest number of ids accepted by a single batch_get call
+MAX_BATCH_GET_IDS = 100
+
+# Largest page of profiles returned by /profiles
+MAX_PROFILES_LIMIT = 1000
+
 class ProfileResponse(BaseModel):
     profiles: List[Dict[str, Any]]
     count: int
 
+class BatchGetRequest(BaseModel):
+    ids: List[str]
+
+class BatchGetResponse(BaseModel):
+    profiles: List[Dict[str, Any]]
+    count: int
+    missing: List[str]
+
 @router.get("/profiles", response_model=ProfileResponse)
-async def get_profiles(limit: int = 100):
+async def get_profiles(request: Request, limit: int = Query(100, ge=1, le=MAX_PROFILES_LIMIT)):
     """
     Get profiles from database with limit
     """
+    etag = await profiles_cache.etag_for("profiles", limit)
+    cached = await profiles_cache.cached(request, etag)
+    if cached is not None:
+        return cached
+
     try:
         chakra = ChakraClient()
-        df = chakra.query_data("linkedin_profiles", limit=limit)
+        df = await asyncio.to_thread(chakra.query_data, "linkedin_profiles", limit=limit)
         profiles = df.to_dict('records')
 
-        return ProfileResponse(
+        return await profiles_cache.respond(request, etag, ProfileResponse(
             profiles=profiles,
             count=len(profiles)
-        )
+        ))
 
     except Exception as e:
         logging.error(f"Error in get_profiles endpoint: {str(e)}")
@@ -32,10 +63,77 @@ async def get_profiles(limit: int = 100):
             detail=f"Failed to fetch profiles: {str(e)}"
         )
 
+@router.get("/profiles/{profile_id}")
+async def get_profile(request: Request, profile_id: str):
+    """
+    Get a single profile by its id
+    """
+    etag = await profiles_cache.etag_for("profile", profile_id)
+    cached = await profiles_cache.cached(request, etag)
+    if cached is not None:
+        return cached
+
+    try:
+        chakra = ChakraClient()
+        df = await asyncio.to_thread(chakra.get_profiles_by_ids, [profile_id])
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logging.error(f"Error in get_profile endpoint: {str(e)}")
+        raise HTTPException(
+            status_code=500,
+            detail=f"Failed to fetch profile: {str(e)}"
+        )
+
+    if df.empty:
+        raise HTTPException(
+            status_code=404,
+            detail=f"Profile not found: {profile_id}"
+        )
+    return await profiles_cache.respond(request, etag, df.to_dict('records')[0])
+
+@router.post("/profiles/batch_get", response_model=BatchGetResponse)
+async def batch_get_profiles(body: BatchGetRequest):
+    """
+    Get many profiles by id in one lookup
+    """
+    if len(body.ids) > MAX_BATCH_GET_IDS:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Cannot fetch more than {MAX_BATCH_GET_IDS} profiles at once"
+        )
+
+    try:
+        chakra = ChakraClient()
+        df = await asyncio.to_thread(chakra.get_profiles_by_ids, body.ids)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logging.error(f"Error in batch_get_profiles endpoint: {str(e)}")
+        raise HTTPException(
+            status_code=500,
+            detail=f"Failed to fetch profiles: {str(e)}"
+        )
+
+    profiles = df.to_dict('records') if not df.empty else []
+    found = {profile[PROFILE_ID_COLUMN] for profile in profiles}
+    return BatchGetResponse(
+        profiles=profiles,
+        count=len(profiles),
+        missing=[i for i in dict.fromkeys(body.ids) if i not in found]
+    )
+
 @router.get("/search")
-async def search_profiles(question: str):
+async def search_profiles(
+    request: Request,
+    question: str,
+    x_request_timeout: Optional[float] = Header(None)
+):
     """
     Search profiles using natural language query
+
+    The X-Request-Timeout header (seconds) shortens the request deadline;
+    it is capped at SEARCH_TIMEOUT_SECONDS.
     """
     logging.info(f"Received search request with question: {question}")
 
@@ -45,14 +143,47 @@ async def search_profiles(question: str):
             detail="Search query cannot be empty"
         )
 
+    timeout = SEARCH_TIMEOUT_SECONDS
+    if x_request_timeout is not None:
+        if x_request_timeout <= 0:
+            raise HTTPException(
+                status_code=400,
+                detail="X-Request-Timeout must be a positive number of seconds"
+            )
+        timeout = min(timeout, x_request_timeout)
+    deadline = Deadline(timeout)
+
+    # A repeat of a question against the same dataset skips the LLM and the query
+    etag = await profiles_cache.etag_for("search", question.strip(), timeout=deadline.remaining())
+    cached = await profiles_cache.cached(request, etag)
+    if cached is not None:
+        return cached
+
     try:
-        chakra = ChakraClient()
-        results, sql_query = chakra.execute_natural_query(question)
-        return {
+        async with search_admission.admit(deadline) as slot:
+            chakra = ChakraClient()
+            results, sql_query = await chakra.aexecute_natural_query(
+                question,
+                timeout=deadline.remaining(),
+                executor=slot
+            )
+        return await profiles_cache.respond(request, etag, {
             "results": results.to_dict('records') if not results.empty else [],
             "count": len(results),
             "sql_query": sql_query
-        }
+        })
+    except Overloaded as e:
+        raise HTTPException(
+            status_code=e.status_code,
+            detail=e.reason,
+            headers=e.headers
+        )
+    except asyncio.TimeoutError:
+        logging.warning(f"Search request exceeded its {timeout}s deadline")
+        raise HTTPException(
+            status_code=504,
+            detail=f"Search did not complete within {timeout} seconds"
+        )
     except Exception as e:
         logging.error(f"Error in search_profiles endpoint: {str(e)}")
         raise HTTPException(
@@ -0,0 +1,285 @@
+import asyncio
+import gzip
+import hashlib
+import json
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Optional, Dict, List
+from fastapi import Request, Response
+from fastapi.encoders import jsonable_encoder
+from chakra_api.chakra_client import ChakraClient
+import zstandard
+import logging
+
+# Bodies smaller than this are sent uncompressed
+MIN_COMPRESS_BYTES = 1024
+
+# Bodies larger than this are compressed in a worker thread
+THREAD_COMPRESS_BYTES = 64 * 1024
+
+# Supported encodings, most preferred first
+ENCODINGS = ["zstd", "gzip"]
+
+
+class DatasetVersion:
+    def __init__(self, table_name: str, ttl: float, fetch_timeout: float):
+        """
+        In-process copy of a table's dataset version, refreshed at most every ttl seconds
+
+        Args:
+            table_name (str): Table whose version is tracked
+            ttl (float): Seconds a fetched version is trusted before re-checking
+            fetch_timeout (float): Longest wait for Chakra before treating the
+                version as unknown
+        """
+        self.table_name = table_name
+        self.ttl = ttl
+        self.fetch_timeout = fetch_timeout
+        self._version: Optional[int] = None
+        self._fetched_at: Optional[float] = None
+        self._lock = asyncio.Lock()
+
+    def _fresh(self) -> bool:
+        return self._fetched_at is not None and time.monotonic() - self._fetched_at < self.ttl
+
+    async def get(self, timeout: Optional[float] = None) -> Optional[int]:
+        """
+        Current version, or None when it is unknown and responses must not be cached
+
+        Args:
+            timeout (float, optional): Longest this caller will wait, including
+                time spent behind another request's refresh
+        """
+        if self._fresh():
+            return self._version
+        try:
+            # Shielded so a caller giving up doesn't abort the shared refresh
+            return await asyncio.wait_for(asyncio.shield(self._refresh()), timeout=timeout)
+        except asyncio.TimeoutError:
+            return None
+
+    async def _refresh(self) -> Optional[int]:
+        async with self._lock:
+            # Another request may have refreshed while we waited for the lock
+            if self._fresh():
+                return self._version
+            try:
+                # Built on the loop thread like in the handlers, so a cold start
+                # logs in once and the timeout only covers the version query
+                chakra = ChakraClient()
+                self._version = await asyncio.wait_for(
+                    asyncio.to_thread(chakra.get_dataset_version, self.table_name),
+                    timeout=self.fetch_timeout
+                )
+            except asyncio.TimeoutError:
+                logging.warning(f"Timed out fetching dataset version for {self.table_name}")
+                self._version = None
+            except Exception as e:
+                logging.warning(f"Could not fetch dataset version for {self.table_name}: {str(e)}")
+                self._version = None
+            self._fetched_at = time.monotonic()
+            return self._version
+
+
+class CompressedResponseCache:
+    def __init__(self, max_bytes: int, max_body_bytes: int):
+        """
+        LRU cache of encoded response bodies keyed by ETag and content encoding
+
+        Args:
+            max_bytes (int): Total size of all stored bodies before the oldest
+                ETags are evicted
+            max_body_bytes (int): Bodies larger than this are never cached
+        """
+        self.max_bytes = max_bytes
+        self.max_body_bytes = max_body_bytes
+        self._entries: "OrderedDict[str, Dict[str, bytes]]" = OrderedDict()
+        self._size = 0
+
+    def get(self, etag: str, encoding: str) -> Optional[bytes]:
+        """Body stored for this ETag in the given encoding, if any"""
+        entry = self._entries.get(etag)
+        if entry is None or encoding not in entry:
+            return None
+        self._entries.move_to_end(etag)
+        return entry[encoding]
+
+    def put(self, etag: str, encoding: str, body: bytes) -> None:
+        """
+        Store a body for this ETag; the identity body must be stored first
+        """
+        if encoding == "identity":
+            if len(body) > self.max_body_bytes:
+                return
+            entry = self._entries.setdefault(etag, {})
+        else:
+            entry = self._entries.get(etag)
+            if entry is None:
+                # Identity body was too large or has been evicted
+                return
+        if encoding in entry:
+            return
+        self._entries.move_to_end(etag)
+        self._store(entry, encoding, body)
+        self._evict()
+
+    def _store(self, entry: Dict[str, bytes], encoding: str, body: bytes) -> None:
+        entry[encoding] = body
+        self._size += len(body)
+
+    def _evict(self) -> None:
+        while self._size > self.max_bytes and self._entries:
+            _, entry = self._entries.popitem(last=False)
+            self._size -= sum(len(body) for body in entry.values())
+
+
+def compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "zstd":
+        # Compressor objects aren't safe to share between threads
+        return zstandard.ZstdCompressor(level=3).compress(body)
+    if encoding == "gzip":
+        return gzip.compress(body, compresslevel=6)
+    return body
+
+
+async def compress_async(body: bytes, encoding: str) -> bytes:
+    """Compress small bodies inline and large ones off the event loop"""
+    if encoding == "identity":
+        return body
+    if len(body) > THREAD_COMPRESS_BYTES:
+        return await asyncio.to_thread(compress, body, encoding)
+    return compress(body, encoding)
+
+
+def negotiate_encoding(request: Request, body: bytes) -> str:
+    """
+    Pick the best supported encoding from the Accept-Encoding header
+    """
+    if len(body) < MIN_COMPRESS_BYTES:
+        return "identity"
+
+    accepted: Dict[str, float] = {}
+    for item in request.headers.get("accept-encoding", "").split(","):
+        parts = [p.strip() for p in item.split(";")]
+        if not parts[0]:
+            continue
+        quality = 1.0
+        for param in parts[1:]:
+            if param.startswith("q="):
+                try:
+                    quality = float(param[2:])
+                except ValueError:
+                    quality = 0.0
+        accepted[parts[0].lower()] = quality
+
+    best, best_quality = "identity", 0.0
+    for encoding in ENCODINGS:
+        quality = accepted.get(encoding, accepted.get("*", 0.0))
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+def make_etag(version: int, *parts: Any) -> str:
+    """
+    Weak ETag for a response derived from the dataset version and request parameters
+    """
+    digest = hashlib.sha1(json.dumps([str(p) for p in parts]).encode("utf-8")).hexdigest()[:16]
+    return f'W/"v{version}-{digest}"'
+
+
+def _etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    # Weak comparison: ignore the W/ prefix on either side
+    candidates: List[str] = [c.strip().removeprefix("W/") for c in header.split(",")]
+    return etag.removeprefix("W/") in candidates
+
+
+def _headers(etag: Optional[str]) -> Dict[str, str]:
+    headers = {"Vary": "Accept-Encoding"}
+    if etag is not None:
+        headers["ETag"] = etag
+        headers["Cache-Control"] = "no-cache"
+    return headers
+
+
+def _encoded_response(body: bytes, encoding: str, etag: Optional[str]) -> Response:
+    headers = _headers(etag)
+    if encoding != "identity":
+        headers["Content-Encoding"] = encoding
+    return Response(content=body, media_type="application/json", headers=headers)
+
+
+class ConditionalResponder:
+    def __init__(self, version: DatasetVersion, cache: CompressedResponseCache):
+        """
+        Answer read endpoints from ETags and cached bodies before touching the backend
+        """
+        self.version = version
+        self.cache = cache
+
+    @classmethod
+    def from_env(cls, table_name: str) -> "ConditionalResponder":
+        return cls(
+            DatasetVersion(
+                table_name,
+                ttl=float(os.getenv("DATASET_VERSION_TTL_SECONDS", 30)),
+                fetch_timeout=float(os.getenv("DATASET_VERSION_TIMEOUT_SECONDS", 2))
+            ),
+            CompressedResponseCache(
+                max_bytes=int(os.getenv("RESPONSE_CACHE_MAX_BYTES", 64 * 1024 * 1024)),
+                max_body_bytes=int(os.getenv("RESPONSE_CACHE_MAX_BODY_BYTES", 4 * 1024 * 1024))
+            ),
+        )
+
+    async def etag_for(self, *parts: Any, timeout: Optional[float] = None) -> Optional[str]:
+        """ETag for a response, or None when the dataset version is unknown"""
+        version = await self.version.get(timeout=timeout)
+        if version is None:
+            return None
+        return make_etag(version, *parts)
+
+    async def _encode(self, etag: Optional[str], body: bytes, encoding: str) -> bytes:
+        if etag is None:
+            return await compress_async(body, encoding)
+        encoded = self.cache.get(etag, encoding)
+        if encoded is None:
+            encoded = await compress_async(body, encoding)
+            self.cache.put(etag, encoding, encoded)
+        return encoded
+
+    async def cached(self, request: Request, etag: Optional[str]) -> Optional[Response]:
+        """
+        A 304 or a cached body for this ETag, or None if the handler has to run
+        """
+        if etag is None:
+            return None
+        if _etag_matches(request, etag):
+            return Response(status_code=304, headers=_headers(etag))
+
+        body = self.cache.get(etag, "identity")
+        if body is None:
+            return None
+        encoding = negotiate_encoding(request, body)
+        return _encoded_response(await self._encode(etag, body, encoding), encoding, etag)
+
+    async def respond(self, request: Request, etag: Optional[str], content: Any) -> Response:
+        """
+        Serialize content to JSON and send it compressed, caching it under the ETag
+        """
+        body = json.dumps(
+            jsonable_encoder(content),
+            ensure_ascii=False,
+            allow_nan=False,
+            separators=(",", ":"),
+        ).encode("utf-8")
+
+        if etag is not None:
+            self.cache.put(etag, "identity", body)
+        encoding = negotiate_encoding(request, body)
+        return _encoded_response(await self._encode(etag, body, encoding), encoding, etag)
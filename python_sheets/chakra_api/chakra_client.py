@@ -1,6 +1,11 @@
 from chakra_py import Chakra
+import asyncio
+from concurrent.futures import Executor
+import hashlib
+import re
+import time
 import pandas as pd
-from typing import Optional
+from typing import Optional, List
 from dotenv import load_dotenv
 import os
 import sys
@@ -12,6 +17,41 @@ sys.path.insert(0, project_root)
 
 from python_sheets.models.search import SQLQueryGenerator
 
+PROFILE_ID_COLUMN = "profile_id"
+DATASET_VERSIONS_TABLE = "dataset_versions"
+# Attempts at bumping a dataset version before giving up on write conflicts
+VERSION_BUMP_ATTEMPTS = 5
+PROFILE_ID_PATTERN = re.compile(r"[0-9a-f]{16}")
+
+def add_profile_ids(df: pd.DataFrame, id_columns: Optional[List[str]] = None) -> pd.DataFrame:
+    """
+    Add a content-derived profile_id column to a DataFrame of profiles
+
+    The id is the first 16 hex characters of a SHA-1 over the values of
+    id_columns, or of every column when none are given. Ids only survive a
+    reload if those values are unchanged: with the default, any edit to a
+    profile (a new headline, say) gives it a new id and links to the old id
+    stop resolving. Pass id_columns to hash only fields that identify a profile
+    when the data has them. Rows sharing an id collapse to the first one, and
+    rows are returned sorted by id so the stored table is laid out in key order.
+
+    Args:
+        df (pd.DataFrame): Profiles to assign ids to
+        id_columns (list, optional): Columns the id is derived from
+
+    Returns:
+        pd.DataFrame: Copy of df with profile_id as its first column
+    """
+    values = df[id_columns or list(df.columns)].fillna('').astype(str)
+    ids = [
+        hashlib.sha1("\x1f".join(row).encode("utf-8")).hexdigest()[:16]
+        for row in values.itertuples(index=False, name=None)
+    ]
+    df = df.copy()
+    df.insert(0, PROFILE_ID_COLUMN, ids)
+    df = df.drop_duplicates(subset=PROFILE_ID_COLUMN)
+    return df.sort_values(PROFILE_ID_COLUMN).reset_index(drop=True)
+
 class ChakraClient:
     _instance = None
 
@@ -62,9 +102,66 @@ class ChakraClient:
             logging.error(f"Error executing query: {str(e)}")
             raise
 
-    def push_data(self, table_name: str, data: pd.DataFrame, create_if_missing: bool = True) -> None:
+    def create_index(self, table_name: str, column: str) -> None:
+        """
+        Create an index on a column so point lookups don't scan the table
+        """
+        try:
+            query = f"CREATE INDEX IF NOT EXISTS idx_{table_name}_{column} ON {table_name} ({column})"
+            logging.info(f"Executing query: {query}")
+            self.client.execute(query)
+        except Exception as e:
+            logging.error(f"Error creating index: {str(e)}")
+            raise
+
+    def get_profiles_by_ids(self, profile_ids: List[str], table_name: str = "linkedin_profiles") -> pd.DataFrame:
+        """
+        Fetch profiles by id in a single indexed lookup
+
+        Args:
+            profile_ids (list): Profile ids as assigned by add_profile_ids
+            table_name (str): Name of the profiles table
+
+        Returns:
+            pd.DataFrame: Matching profiles in the order they were requested;
+            unknown ids are left out
+        """
+        for profile_id in profile_ids:
+            if not PROFILE_ID_PATTERN.fullmatch(profile_id):
+                raise ValueError(f"Invalid profile id: {profile_id}")
+
+        unique_ids = list(dict.fromkeys(profile_ids))
+        if not unique_ids:
+            return pd.DataFrame()
+
+        id_list = ", ".join(f"'{profile_id}'" for profile_id in unique_ids)
+        query = f"SELECT * FROM {table_name} WHERE {PROFILE_ID_COLUMN} IN ({id_list})"
+        try:
+            logging.info(f"Executing query: {query}")
+            df = self.client.execute(query)
+        except Exception as e:
+            logging.error(f"Error executing query: {str(e)}")
+            raise
+
+        if df.empty:
+            return df
+        # Guard against a table that was appended to instead of replaced
+        df = df.drop_duplicates(subset=PROFILE_ID_COLUMN)
+        df = df.set_index(PROFILE_ID_COLUMN, drop=False)
+        return df.loc[[i for i in unique_ids if i in df.index]].reset_index(drop=True)
+
+    def push_data(
+        self,
+        table_name: str,
+        data: pd.DataFrame,
+        create_if_missing: bool = True,
+        replace_if_exists: bool = False
+    ) -> None:
         """
         Push DataFrame to specified table with proper data type handling
+
+        Rows are appended unless replace_if_exists is set, in which case the
+        existing table is dropped first.
         """
         try:
             # Clean column names: replace spaces with underscores and remove special characters
@@ -80,13 +177,70 @@ class ChakraClient:
             self.client.push(
                 table_name,
                 data,
-                create_if_missing=create_if_missing
+                create_if_missing=create_if_missing,
+                replace_if_exists=replace_if_exists
             )
 
         except Exception as e:
             print(f"Error pushing data: {e}")
             raise
 
+        try:
+            # Let readers know their cached copies of this table are stale
+            self._bump_dataset_version(table_name)
+        except Exception as e:
+            print(f"Pushed data to {table_name} but failed to bump its dataset version, "
+                  f"API responses may be stale until the next load: {e}")
+            raise
+
+    def get_dataset_version(self, table_name: str) -> Optional[int]:
+        """
+        Get the current generation of a table, or None if it was never recorded
+        """
+        query = (
+            f"SELECT version FROM {DATASET_VERSIONS_TABLE} "
+            f"WHERE table_name = '{table_name}'"
+        )
+        df = self.client.execute(query)
+        if df.empty or pd.isna(df["version"].iloc[0]):
+            return None
+        return int(df["version"].iloc[0])
+
+    def _bump_dataset_version(self, table_name: str) -> Optional[int]:
+        """
+        Record a new generation of a table in the dataset_versions table
+
+        Each table has a single row that is bumped with an UPDATE. Two loaders
+        bumping at once hit a write-write conflict instead of both writing the
+        same version; the one that loses retries.
+        """
+        self.client.execute(
+            f"CREATE TABLE IF NOT EXISTS {DATASET_VERSIONS_TABLE} "
+            f"(table_name VARCHAR PRIMARY KEY, version BIGINT, updated_at TIMESTAMP)"
+        )
+        self.client.execute(
+            f"INSERT INTO {DATASET_VERSIONS_TABLE} VALUES ('{table_name}', 0, now()) "
+            f"ON CONFLICT DO NOTHING"
+        )
+
+        for attempt in range(1, VERSION_BUMP_ATTEMPTS + 1):
+            try:
+                self.client.execute(
+                    f"UPDATE {DATASET_VERSIONS_TABLE} "
+                    f"SET version = version + 1, updated_at = now() "
+                    f"WHERE table_name = '{table_name}'"
+                )
+                break
+            except Exception as e:
+                if "conflict" not in str(e).lower() or attempt == VERSION_BUMP_ATTEMPTS:
+                    raise
+                logging.warning(f"Conflict bumping {table_name} version, retrying ({attempt}/{VERSION_BUMP_ATTEMPTS})")
+                time.sleep(0.1 * attempt)
+
+        version = self.get_dataset_version(table_name)
+        logging.info(f"Bumped {table_name} to dataset version {version}")
+        return version
+
     def parquet_to_pandas(self, file_path: str, columns: Optional[list] = None) -> pd.DataFrame:
         """
         Convert parquet file to pandas DataFrame
@@ -127,6 +281,50 @@ class ChakraClient:
         df = self.client.execute(sql_query)
         return df, sql_query
 
+    async def aexecute_natural_query(
+        self,
+        question: str,
+        timeout: Optional[float] = None,
+        executor: Optional[Executor] = None
+    ) -> tuple[pd.DataFrame, str]:
+        """
+        Execute a natural language query without blocking the event loop
+
+        The timeout covers both SQL generation and query execution. The LLM
+        call is cancelled outright. chakra_py's execute takes no timeout, so the
+        Chakra call runs on the executor: if it hasn't started by the deadline
+        it is cancelled, otherwise its result is discarded when it finishes.
+
+        Args:
+            question (str): Natural language question about the database
+            timeout (float, optional): Total seconds allowed for the query
+            executor (Executor, optional): Where to run the Chakra call; the
+                event loop's default executor if not given
+
+        Returns:
+            tuple: (DataFrame with results, SQL query string)
+
+        Raises:
+            asyncio.TimeoutError: If the timeout expires before results are ready
+        """
+        expires_at = time.monotonic() + timeout if timeout is not None else None
+
+        sql_query = await self.query_generator.agenerate_query(question, timeout=timeout)
+        logging.info(f"Generated SQL query: {sql_query}")
+
+        remaining = None
+        if expires_at is not None:
+            remaining = expires_at - time.monotonic()
+            if remaining <= 0:
+                raise asyncio.TimeoutError()
+
+        loop = asyncio.get_running_loop()
+        df = await asyncio.wait_for(
+            loop.run_in_executor(executor, self.client.execute, sql_query),
+            timeout=remaining
+        )
+        return df, sql_query
+
 def load_profiles_to_db():
     """
     Load LinkedIn profiles from parquet to database
@@ -142,7 +340,16 @@ def load_profiles_to_db():
         
         parquet_file = "python_sheets/data/train-00000-of-00002.parquet"
         df_from_parquet = chakra.parquet_to_pandas(parquet_file, columns)
-        chakra.push_data("linkedin_profiles", df_from_parquet)
+        # The dataset has no unique identity field (no profile URL), so ids are
+        # derived from the full profile and change whenever its content does
+        df_from_parquet = add_profile_ids(df_from_parquet)
+        # Replace rather than append so a reload doesn't duplicate profile ids
+        chakra.push_data("linkedin_profiles", df_from_parquet, replace_if_exists=True)
+        try:
+            chakra.create_index("linkedin_profiles", PROFILE_ID_COLUMN)
+        except Exception as e:
+            # Rows are stored sorted by id, so lookups still prune without the index
+            print(f"Warning: could not index profile ids: {e}")
 
         print("Successfully loaded profiles to database")
         return df_from_parquet
@@ -6,6 +6,12 @@ from dotenv import load_dotenv
 from typing import Optional, Union, List
 import logging
 
+def _sql_literal(value) -> str:
+    """Render a key value as a SQL literal, quoting anything that isn't a number"""
+    if pd.api.types.is_number(value):
+        return str(value)
+    return "'" + str(value).replace("'", "''") + "'"
+
 class ChakraToMotherDuckLoader:
     def __init__(self, motherduck_db: str = "my_db"):
         """
@@ -55,7 +61,8 @@ class ChakraToMotherDuckLoader:
         table_name: str,
         batch_size: Optional[int] = None,
         replace: bool = True,
-        clean_columns: bool = True
+        clean_columns: bool = True,
+        key_column: Optional[str] = None
     ) -> None:
         """
         Load data from Chakra to MotherDuck
@@ -66,12 +73,14 @@ class ChakraToMotherDuckLoader:
             batch_size (int, optional): Size of batches for loading large datasets
             replace (bool): If True, replace existing table; if False, append
             clean_columns (bool): If True, clean column names for compatibility
+            key_column (str, optional): Unique column to page batches by; makes
+                batching deterministic instead of relying on LIMIT/OFFSET order
         """
         try:
             self.logger.info(f"Executing Chakra query: {chakra_query}")
             
             if batch_size:
-                self._batch_load(chakra_query, table_name, batch_size, replace, clean_columns)
+                self._batch_load(chakra_query, table_name, batch_size, replace, clean_columns, key_column)
             else:
                 self._single_load(chakra_query, table_name, replace, clean_columns)
                 
@@ -104,21 +113,30 @@ class ChakraToMotherDuckLoader:
         table_name: str,
         batch_size: int,
         replace: bool,
-        clean_columns: bool
+        clean_columns: bool,
+        key_column: Optional[str] = None
     ) -> None:
-        """Handle batched data load"""
+        """Handle batched data load, paging by key_column if given, else by offset"""
         offset = 0
+        last_key = None
         first_batch = True
         
         while True:
-            # Add LIMIT and OFFSET to query
-            batch_query = f"{query} LIMIT {batch_size} OFFSET {offset}"
+            if key_column:
+                # Keyset paging: continue after the last key of the previous batch
+                where = f"WHERE {key_column} > {_sql_literal(last_key)} " if last_key is not None else ""
+                batch_query = f"SELECT * FROM ({query}) AS src {where}ORDER BY {key_column} LIMIT {batch_size}"
+            else:
+                batch_query = f"{query} LIMIT {batch_size} OFFSET {offset}"
             
             # Get batch from Chakra
             df = self.chakra_client.execute(batch_query)
             
             if df.empty:
                 break
+
+            if key_column:
+                last_key = df[key_column].iloc[-1]
                 
             if clean_columns:
                 df.columns = df.columns.str.replace(' ', '_').str.replace('[^0-9a-zA-Z_]', '')
@@ -126,7 +144,8 @@ class ChakraToMotherDuckLoader:
             # Load to MotherDuck (replace only on first batch if needed)
             self._load_dataframe(df, table_name, replace and first_batch)
             
-            self.logger.info(f"Loaded batch of {len(df)} rows (offset: {offset})")
+            position = f"last key: {last_key}" if key_column else f"offset: {offset}"
+            self.logger.info(f"Loaded batch of {len(df)} rows ({position})")
             
             offset += batch_size
             first_batch = False
@@ -188,7 +207,8 @@ if __name__ == "__main__":
             chakra_query="SELECT * FROM linkedin_profiles",
             table_name="linkedin_full",
             batch_size=1000,
-            replace=True
+            replace=True,
+            key_column="profile_id"
         )
 
         # Example 3: Query the loaded data
@@ -7,7 +7,10 @@ from langchain_core.output_parsers import StrOutputParser
 from langchain_core.runnables import RunnablePassthrough
 from operator import itemgetter
 from langchain_openai import ChatOpenAI
+import openai
 import os
+import asyncio
+from typing import Optional
 from dotenv import load_dotenv
 import duckdb
 from sqlalchemy import create_engine, inspect
@@ -23,11 +26,14 @@ class SQLQueryGenerator:
         if not self.api_key:
             raise ValueError("OPENAI_API_KEY not found in environment variables")
         
-        # Initialize OpenAI client
+        # Initialize OpenAI client, bounded so a hung call can't outlive a request.
+        # Retries are off so OPENAI_TIMEOUT_SECONDS bounds the whole call
         self.llm = ChatOpenAI(
             api_key=self.api_key,
             model="gpt-3.5-turbo",
-            temperature=0
+            temperature=0,
+            timeout=float(os.getenv("OPENAI_TIMEOUT_SECONDS", 30)),
+            max_retries=0
         )
         
         # Initialize database connection with DuckDB
@@ -75,8 +81,40 @@ class SQLQueryGenerator:
             
         Returns:
             str: Generated SQL query
+
+        Raises:
+            asyncio.TimeoutError: If the OpenAI call times out
         """
         try:
             return self.chain.invoke({"input": question})
+        except openai.APITimeoutError as e:
+            raise asyncio.TimeoutError() from e
+        except Exception as e:
+            raise Exception(f"An unexpected error occurred: {str(e)}")
+
+    async def agenerate_query(self, question: str, timeout: Optional[float] = None) -> str:
+        """
+        Generate a SQL query asynchronously, cancelling the LLM call on timeout
+
+        Args:
+            question (str): Natural language question about the database
+            timeout (float, optional): Seconds to wait before giving up
+
+        Returns:
+            str: Generated SQL query
+
+        Raises:
+            asyncio.TimeoutError: If the query is not generated within timeout,
+                or the OpenAI call itself times out
+        """
+        try:
+            return await asyncio.wait_for(
+                self.chain.ainvoke({"input": question}),
+                timeout=timeout
+            )
+        except asyncio.TimeoutError:
+            raise
+        except openai.APITimeoutError as e:
+            raise asyncio.TimeoutError() from e
         except Exception as e:
             raise Exception(f"An unexpected error occurred: {str(e)}")